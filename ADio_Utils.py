@@ -5,20 +5,102 @@
 # - CHリスト指定は "all" に対応（GPIO:0..7, ENC:0..3, ADC:0..15）
 
 from __future__ import annotations
+import asyncio
+import logging
+import queue
+import re
+import threading
 import time
-from typing import Iterable, Union, Optional
+import warnings
+from functools import lru_cache, partial
+from typing import Iterable, Optional, Sequence, Union
+from weakref import WeakKeyDictionary
 
 import ftd2xx
 import ftd2xx.defines as fd
 
+try:
+    import numpy as np
+except ImportError:  # NumPy は配列版API（*_array 等）でのみ使用
+    np = None
+
+
+# 送受信トレース: logging.getLogger("adio").setLevel(logging.DEBUG) で有効化
+_LOG = logging.getLogger("adio")
 
 # ==========
 # 内部ヘルパ
 # ==========
 
-def _open_flag_by_serial() -> int:
-    return getattr(fd, "OPEN_BY_SERIAL_NUMBER",
-           getattr(fd, "FT_OPEN_BY_SERIAL_NUMBER", 1))
+# handle ごとの受信済み未消費データ（_readline の読み過ぎ分）
+_RX_PENDING: "WeakKeyDictionary[object, bytearray]" = WeakKeyDictionary()
+
+# handle ごとの setTimeouts 値 [in_ms, out_ms, 現在ドライバに設定中の in_ms]（set_timeouts で登録）
+_TIMEOUTS: "WeakKeyDictionary[object, list[int]]" = WeakKeyDictionary()
+
+# handle ごとの USB設定（in_bytes, out_bytes, latency_ms）: "cmd"=コマンド応答用 / "stream"=ADC連続受信用
+_STREAM_LATENCY_MS = 16
+_DEFAULT_USB_PROFILES = {
+    "cmd":    (4 * 1024, 64 * 1024, 2),
+    "stream": (64 * 1024, 64 * 1024, _STREAM_LATENCY_MS),
+}
+_USB_PROFILES: "WeakKeyDictionary[object, dict]" = WeakKeyDictionary()
+
+# "all" 指定時のCHリスト/マスク（max_ch: ENC=3, GPIO=7, ADC=15）
+_ALL_LISTS = {n: tuple(range(n + 1)) for n in (3, 7, 15)}
+_ALL_MASKS = {n: (1 << (n + 1)) - 1 for n in (3, 7, 15)}
+
+# エンコーダーステータス応答: '*Dc,COUNT[H],DIR,OVF,AE#'（行全体に一致する素直な形だけ）
+# （'*D' 省略可, COUNT は符号付き可, DIR以降は欠けていてもよい）
+# 一致しない応答は従来の split パーサで解釈する
+_ENC_STATUS_RE = re.compile(
+    rb"\s*(?:\*D)?(?P<ch>[0-9A-F]+),(?P<count>[-+]?[0-9A-F]+)H?"
+    rb"(?:,(?P<dir>[^,#\s]+))?(?:,(?P<ovf>[^,#\s]+))?(?:,(?P<ae>[^,#\s]+))?#?\s*\Z",
+    re.IGNORECASE)
+
+# 応答行 '*OK#\r\n' 等の最終バイト LF（_readline の terminator）をイベント文字にすると、
+# 行末の受信時点でレイテンシタイマを待たず1回で送出される（'#' だと後続の CR/LF が待たされる）
+_EVENT_CHAR = 0x0A
+
+_OPEN_BY_SERIAL = getattr(fd, "OPEN_BY_SERIAL_NUMBER",
+                  getattr(fd, "FT_OPEN_BY_SERIAL_NUMBER", 1))
+
+# Hi-Speed系（FT232H/FT2232H/FT4232H）のデバイス種別
+_HS_DEVICE_TYPES = {
+    getattr(fd, "DEVICE_232H", 8),
+    getattr(fd, "DEVICE_2232H", 6),
+    getattr(fd, "DEVICE_4232H", 7),
+}
+_LATENCY_WARN_MS = 4
+
+def _device_type(info) -> Optional[int]:
+    """getDeviceInfo() の戻り値（dict/tuple どちらでも）からデバイス種別を取り出す。"""
+    try:
+        return int(info["type"] if isinstance(info, dict) else info[0])
+    except Exception:
+        return None
+
+def _device_serial(info) -> str:
+    s = info["serial"] if isinstance(info, dict) else info[2]
+    return s.decode(errors="ignore") if isinstance(s, (bytes, bytearray)) else str(s)
+
+def _resolve_latency_ms(latency_ms: Optional[int], dev_type: Optional[int]) -> int:
+    """
+    レイテンシタイマ値を決定。未指定なら Hi-Speed系=1ms / その他=2ms。
+    範囲は [1,255]（Hi-Speed系以外は 2ms 以上）に丸め、大きすぎる値は警告。
+    """
+    hs = dev_type in _HS_DEVICE_TYPES
+    if latency_ms is None:
+        latency_ms = 1 if hs else 2
+    latency_ms = min(255, max(1 if hs else 2, int(latency_ms)))
+    if latency_ms > _LATENCY_WARN_MS:
+        print(f"[WARN] Latency={latency_ms}ms: 短い応答（*OK# 等）の待ち時間がほぼこの値で決まります")
+    return latency_ms
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("この機能には NumPy が必要です（pip install numpy）")
+    return np
 
 def _is_handle_alive(handle) -> bool:
     try:
@@ -27,56 +109,142 @@ def _is_handle_alive(handle) -> bool:
     except Exception:
         return False
 
-def _write_ascii(handle, s: str) -> None:
-    """FTDIへASCIIコマンド送信し、送信内容を表示"""
-    print(f"→SEND: {s.strip()}")
-    handle.write(s.encode("ascii", errors="ignore"))
-
-def _readline(handle, timeout: float = 2.0, terminator: bytes = b"\n") -> bytes:
-    line = bytearray()
+def _write_ascii(handle, s: Union[str, bytes]) -> None:
+    """FTDIへASCIIコマンド送信（エンコード済み bytes はそのまま送る）。送信内容は DEBUG ログ"""
+    if isinstance(s, str):
+        s = s.encode("ascii", errors="ignore")
+    if _LOG.isEnabledFor(logging.DEBUG):
+        _LOG.debug("→SEND: %s", s.decode("ascii", errors="ignore").strip())
+    handle.write(s)
+
+def _take_pending(handle, limit: Optional[int] = None) -> bytearray:
+    """_readline が terminator 以降まで読んでしまった受信済みデータを取り出す。"""
+    buf = _RX_PENDING.pop(handle, None)
+    if buf is None:
+        return bytearray()
+    if limit is not None and len(buf) > limit:
+        _RX_PENDING[handle] = buf[limit:]
+        del buf[limit:]
+    return buf
+
+def _blocking_read(handle, n: int, deadline: float) -> bytes:
+    """
+    read(n) をドライバ側でブロックさせつつ、待ちを deadline（time.time() 基準）までに抑える。
+    登録済みの受信タイムアウトが無期限または残り時間より長いときだけ setTimeouts で残り時間に縮め
+    （縮めた値は次回必要になるまでそのまま）、残り時間が十分なら登録値へ戻す。
+    タイムアウト未登録の handle は設定値が分からないため触らず、受信キューにある分だけ読む。
+    """
+    remaining_ms = int((deadline - time.time()) * 1000)
+    if remaining_ms <= 0:
+        return b""
+    t = _TIMEOUTS.get(handle)
+    if t is None:
+        n_avail = handle.getQueueStatus()
+        if n_avail > 0:
+            return handle.read(min(n, n_avail))
+        time.sleep(0.001)
+        return b""
+    in_ms, out_ms, cur_ms = t
+    want_ms = in_ms if 0 < in_ms <= remaining_ms else remaining_ms
+    if want_ms != cur_ms:
+        handle.setTimeouts(want_ms, out_ms)
+        t[2] = want_ms
+    return handle.read(n)
+
+def _readline(handle, timeout: float = 2.0, terminator: bytes = b"\n") -> bytearray:
+    """
+    terminator まで1行読む。受信キューにある分は read(n) でまとめて読み、
+    terminator 以降は次回の読み出し用に保持する。
+    キューが空のときは read(1) がドライバ側でブロックする（待ちは timeout の残り時間まで）。
+    """
+    line = _take_pending(handle)
     start = time.time()
-    while time.time() - start < timeout:
-        if handle.getQueueStatus() > 0:
-            b = handle.read(1)
-            if b:
-                line += b
-                if b in terminator:
-                    break
-        else:
-            time.sleep(0.001)
-    return bytes(line)
+    deadline = start + timeout
+    scanned = 0
+    while True:
+        idx = line.find(terminator, scanned)
+        if idx >= 0:
+            end = idx + len(terminator)
+            if end < len(line):
+                _RX_PENDING[handle] = line[end:]
+                del line[end:]
+            break
+        scanned = max(0, len(line) - len(terminator) + 1)
+        if time.time() - start >= timeout:
+            break
+        n = handle.getQueueStatus()
+        chunk = handle.read(n) if n > 0 else _blocking_read(handle, 1, deadline)
+        if chunk:
+            line += chunk
+    return line
+
+def _recv_text(resp: bytearray) -> str:
+    if not resp:
+        return "<no response>"
+    try:
+        return resp.decode(errors="ignore").strip()
+    except Exception:
+        return f"<decode error: {resp[:16]!r}>"
 
-def _send_and_read_one_line(handle, cmd: str, print_line: bool = True) -> bytes:
-    """ASCIIコマンド送信→1行だけ読む。送信＆応答をprint"""
+def _report_recv(resp: bytearray, print_line: bool) -> None:
+    """応答を print_line=True なら表示、そうでなければ DEBUG ログ（無効時はデコードもしない）"""
+    if print_line:
+        print(f"←RECV: {_recv_text(resp)}")
+    elif _LOG.isEnabledFor(logging.DEBUG):
+        _LOG.debug("←RECV: %s", _recv_text(resp))
+
+def _send_and_read_one_line(handle, cmd: Union[str, bytes], print_line: bool = True) -> bytearray:
+    """ASCIIコマンド送信→1行だけ読む。応答は print_line=True で表示"""
     _write_ascii(handle, cmd)
     resp = _readline(handle, timeout=2.0)
-    if resp:
-        try:
-            txt = resp.decode(errors="ignore").strip()
-        except Exception:
-            txt = f"<decode error: {resp[:16]!r}>"
-    else:
-        txt = "<no response>"
-    if print_line:
-        print(f"←RECV: {txt}")
+    _report_recv(resp, print_line)
     return resp
 
-def _fmt_cmd(C: str, HH: int, E: int, DDDD: int) -> str:
+def _send_many_and_read(handle, cmds: list[Union[str, bytes]], print_line: bool = True) -> list[bytearray]:
+    """
+    複数コマンドを1回の write() にまとめて送信→コマンド数ぶん1行応答を読む。
+    CHごとに送信/応答を往復させるより USB の往復回数が 1 回で済む。
+    """
+    if not cmds:
+        return []
+    _write_ascii(handle, b"".join(c if isinstance(c, bytes) else c.encode("ascii") for c in cmds))
+    resps = []
+    for _ in cmds:
+        resp = _readline(handle, timeout=2.0)
+        _report_recv(resp, print_line)
+        resps.append(resp)
+    return resps
+
+_HEX = b"0123456789ABCDEF"
+
+@lru_cache(maxsize=4096)
+def _fmt_cmd_bytes(C: str, HH: int, E: int, DDDD: int) -> bytes:
     """
-    10文字フォーマット: '*C HH E DDDD #' 例: '*B000801#'
+    10文字フォーマット: '*C HH E DDDD #' 例: '*B000801#'（ASCII bytes, 引数ごとにキャッシュ）
     C: '0'～'F' 1桁, HH: 0x00～0xFF 2桁, E: 0x0～0xF 1桁, DDDD: 0x0000～0xFFFF 4桁
+    各フィールドは桁数ぶんの下位ニブルのみ使う（常に10バイト）。
     """
-    s = f"*{C}{HH:02X}{E:X}{DDDD:04X}#"
-    if len(s) != 10:
-        raise RuntimeError(f"cmd length != 10: {s!r} ({len(s)})")
-    return s
+    return bytes((
+        0x2A, ord(C),
+        _HEX[(HH >> 4) & 0xF], _HEX[HH & 0xF],
+        _HEX[E & 0xF],
+        _HEX[(DDDD >> 12) & 0xF], _HEX[(DDDD >> 8) & 0xF], _HEX[(DDDD >> 4) & 0xF], _HEX[DDDD & 0xF],
+        0x23,
+    ))
 
-def _normalize_channels(chs: Union[str, int, Iterable[int]], *, max_ch: int) -> list[int]:
+def _fmt_cmd(C: str, HH: int, E: int, DDDD: int) -> str:
+    """_fmt_cmd_bytes の文字列版（戻り値として返すコマンド文字列用）。"""
+    return _fmt_cmd_bytes(C, HH, E, DDDD).decode("ascii")
+
+def _normalize_channels(chs: Union[str, int, Iterable[int]], *, max_ch: int) -> Sequence[int]:
     """
-    'all' → [0..max_ch], int → [int], 反復可能 → 昇順ユニーク
+    'all' → (0..max_ch)（共有タプル）, int → [int], 反復可能 → 昇順ユニーク
     """
     if isinstance(chs, str) and chs.lower() == "all":
-        return list(range(max_ch + 1))
+        all_list = _ALL_LISTS.get(max_ch)
+        return all_list if all_list is not None else tuple(range(max_ch + 1))
+    if chs is _ALL_LISTS.get(max_ch):
+        return chs
     if isinstance(chs, int):
         chs = [chs]
     try:
@@ -89,6 +257,8 @@ def _normalize_channels(chs: Union[str, int, Iterable[int]], *, max_ch: int) ->
     return lst
 
 def _mask_from_channels(ch_list: Iterable[int]) -> int:
+    if type(ch_list) is tuple and _ALL_LISTS.get(len(ch_list) - 1) is ch_list:
+        return _ALL_MASKS[len(ch_list) - 1]
     m = 0
     for ch in ch_list:
         m |= (1 << ch)
@@ -128,15 +298,30 @@ def list_ftdi_serials() -> list[str]:
 def open_ftdi(serial: Optional[str] = None,
               in_timeout_ms: int = 100,
               out_timeout_ms: int = 100,
-              latency_ms: int = 2,
-              usb_in_kb: int = 64,
-              usb_out_kb: int = 64):
-    """FTDIを開いて基本設定。"""
+              latency_ms: Optional[int] = None,
+              usb_in_kb: Optional[int] = None,
+              usb_out_kb: int = 64,
+              *,
+              usb_in_kb_cmd: int = 4,
+              usb_in_kb_stream: int = 64,
+              slow_reset: bool = False):
+    """
+    FTDIを開いて基本設定（コマンド応答用の設定で開く）。
+    latency_ms 未指定時は FT232H/FT2232H 等で 1ms、その他で 2ms。
+    コマンド応答はすべて短いパケットのため、応答時間はほぼレイテンシタイマで決まる
+    （16ms 等の大きな値では数倍遅くなる）。
+    usb_in_kb_stream はADC連続受信中（set_streaming_mode(handle, True)）の受信バッファサイズ。
+    usb_out_kb は両モード共通の送信バッファサイズ。usb_in_kb は usb_in_kb_stream の旧名（非推奨, 位置引数の並びは従来どおり）。
+    resetDevice 後の待ちは 10ms（slow_reset=True で従来の 100ms）。
+    """
+    if usb_in_kb is not None:
+        warnings.warn("open_ftdi(usb_in_kb=...) は非推奨です。usb_in_kb_stream を使ってください",
+                      DeprecationWarning, stacklevel=2)
+        usb_in_kb_stream = usb_in_kb
     try:
         if serial:
-            flag = _open_flag_by_serial()
             ser_b = serial.encode("ascii", errors="ignore") if isinstance(serial, str) else serial
-            handle = ftd2xx.openEx(ser_b, flag)
+            handle = ftd2xx.openEx(ser_b, _OPEN_BY_SERIAL)
         else:
             devs = ftd2xx.listDevices()
             if not devs:
@@ -145,20 +330,29 @@ def open_ftdi(serial: Optional[str] = None,
             handle = ftd2xx.open(0)
 
         handle.resetDevice()
-        time.sleep(0.1)
-        handle.purge(fd.PURGE_RX | fd.PURGE_TX)
-        time.sleep(0.05)
+        time.sleep(0.1 if slow_reset else 0.01)
+        handle.setBitMode(0x00, 0x00)
+
+        try:
+            info = handle.getDeviceInfo()
+        except Exception:
+            info = None
+        latency_ms = _resolve_latency_ms(latency_ms, _device_type(info) if info else None)
 
-        handle.setTimeouts(in_timeout_ms, out_timeout_ms)
-        handle.setUSBParameters(usb_in_kb * 1024, usb_out_kb * 1024)
+        set_timeouts(handle, in_timeout_ms, out_timeout_ms)
+        handle.setUSBParameters(usb_in_kb_cmd * 1024, usb_out_kb * 1024)
         handle.setLatencyTimer(latency_ms)
+        handle.setChars(_EVENT_CHAR, 1, 0, 0)
         handle.setFlowControl(fd.FLOW_NONE, 0, 0)
-        handle.purge()
+        handle.purge(fd.PURGE_RX | fd.PURGE_TX)
+        _USB_PROFILES[handle] = {
+            "cmd":    (usb_in_kb_cmd * 1024, usb_out_kb * 1024, latency_ms),
+            "stream": (usb_in_kb_stream * 1024, usb_out_kb * 1024, _STREAM_LATENCY_MS),
+        }
 
         try:
-            info = handle.getDeviceInfo()
-            s = info[2].decode() if isinstance(info[2], (bytes, bytearray)) else info[2]
-            print(f"[FTDI] Opened Serial={s}, Latency={latency_ms}ms, USB(IN/OUT)={usb_in_kb}/{usb_out_kb}KB")
+            s = _device_serial(info)
+            print(f"[FTDI] Opened Serial={s}, Latency={latency_ms}ms, USB(IN/OUT)={usb_in_kb_cmd}/{usb_out_kb}KB")
         except Exception:
             pass
 
@@ -173,46 +367,149 @@ def open_ftdi(serial: Optional[str] = None,
                 print("接続中のFTDIデバイスが見つかりません。")
         return None
 
-def flush_input_buffer(handle, wait_time=0.05, stable_count=5, max_attempts=3) -> str:
-    """受信バッファを読み捨て。"""
-    empty_counter = 0
-    attempts = 0
-    all_data = []
-    while empty_counter < stable_count and attempts < max_attempts:
-        time.sleep(wait_time)
+def set_timeouts(handle, in_timeout_ms: int, out_timeout_ms: int) -> None:
+    """
+    setTimeouts を行い、その値を記録する（open_ftdi は自動で登録）。
+    open_ftdi 以外で開いた handle もこれで登録すると、_readline/read_exact が
+    ドライバ側ブロックで待つ（未登録の handle は 1ms 間隔のポーリングになる）。
+    """
+    handle.setTimeouts(in_timeout_ms, out_timeout_ms)
+    _TIMEOUTS[handle] = [in_timeout_ms, out_timeout_ms, in_timeout_ms]
+
+def set_streaming_mode(handle, on: bool) -> None:
+    """
+    USBバッファサイズとレイテンシタイマを切り替え。
+    on=True : ADC連続受信用（大きい受信バッファ, レイテンシ16ms, イベント文字 LF 無効）
+    on=False: コマンド応答用（open_ftdi 時の設定。小さい受信バッファ, 短いレイテンシ, 行末 LF で即送出）
+    ※ バイナリのADCデータ中の 0x0A で細切れに送出されないよう、連続受信中はイベント文字を無効にする
+    """
+    profile = _USB_PROFILES.get(handle, _DEFAULT_USB_PROFILES)
+    in_bytes, out_bytes, latency_ms = profile["stream" if on else "cmd"]
+    handle.setUSBParameters(in_bytes, out_bytes)
+    handle.setLatencyTimer(latency_ms)
+    handle.setChars(_EVENT_CHAR, 0 if on else 1, 0, 0)
+
+def configure_for_streaming(handle) -> None:
+    set_streaming_mode(handle, True)
+
+def configure_for_commands(handle) -> None:
+    set_streaming_mode(handle, False)
+
+def flush_input_buffer(handle, wait_time=0.05, stable_count=5, max_attempts=3,
+                       wait_for_quiescence: bool = False) -> str:
+    """
+    受信バッファを読み捨て。キューに残っている分を1回だけ読んで表示し、PURGE_RX で破棄する。
+    wait_for_quiescence=True のときは従来どおり wait_time 間隔で確認し、
+    stable_count 回連続で空になる（または max_attempts 回読む）まで待つ。
+    """
+    raw = _take_pending(handle)
+    if wait_for_quiescence:
+        empty_counter = 0
+        attempts = 0
+        while empty_counter < stable_count and attempts < max_attempts:
+            time.sleep(wait_time)
+            bytes_avail = handle.getQueueStatus()
+            if bytes_avail > 0:
+                raw += handle.read(bytes_avail)
+                empty_counter = 0
+                attempts += 1
+            else:
+                empty_counter += 1
+    else:
         bytes_avail = handle.getQueueStatus()
         if bytes_avail > 0:
-            raw = handle.read(bytes_avail)
-            try:
-                text = raw.decode(errors='ignore').strip()
-            except Exception:
-                text = f"<decode error: {raw[:16]!r}>"
-            if text:
-                for line in text.splitlines():
-                    line = line.strip()
-                    print(f"[flush] {line}")
-                    all_data.append(line)
-            empty_counter = 0
-            attempts += 1
-        else:
-            empty_counter += 1
+            raw += handle.read(bytes_avail)
+    handle.purge(fd.PURGE_RX)
+
+    all_data = []
+    try:
+        text = raw.decode(errors='ignore').strip()
+    except Exception:
+        text = f"<decode error: {raw[:16]!r}>"
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            print(f"[flush] {line}")
+            all_data.append(line)
     return "\n".join(all_data)
 
-def read_exact(handle, size: int, timeout: float = 1.0) -> Optional[bytes]:
-    """指定バイト数が揃うまで read()。揃わなければ None。"""
-    buf = bytearray()
+def _read_into(handle, mv: memoryview, timeout: float, label: str) -> bool:
+    """
+    書き込み可能な memoryview（バイト単位）が埋まるまで read()。揃わなければ False。
+    _readline の読み過ぎ分を先に使い、残りバイト数を一度に要求してドライバ側でブロックする
+    （待ちは timeout の残り時間まで。短く返ったときだけ再試行）。
+    """
+    size = mv.nbytes
+    pending = _take_pending(handle, size)
+    off = len(pending)
+    mv[:off] = pending
     start = time.time()
-    while len(buf) < size:
+    deadline = start + timeout
+    while off < size:
         if time.time() - start > timeout:
-            print(f"[TIMEOUT] read_exact {len(buf)}/{size} bytes")
-            return None
-        n = handle.getQueueStatus()
-        if n > 0:
-            to_read = min(size - len(buf), n)
-            buf.extend(handle.read(to_read))
+            print(f"[TIMEOUT] {label} {off}/{size} bytes")
+            return False
+        chunk = _blocking_read(handle, size - off, deadline)
+        if chunk:
+            mv[off:off + len(chunk)] = chunk
+            off += len(chunk)
+    return True
+
+def read_exact(handle, size: int, timeout: float = 1.0) -> Optional[bytearray]:
+    """
+    指定バイト数が揃うまで read()。揃わなければ None。
+    確保済みの bytearray に直接書き込み、コピーせずそのまま返す。
+    """
+    buf = bytearray(size)
+    return buf if _read_into(handle, memoryview(buf), timeout, "read_exact") else None
+
+def read_adc_chunk(handle, n_samples: int, dtype="int32", timeout: float = 1.0):
+    """
+    n_samples 件のADCデータを、確保済みの NumPy 配列（dtype のリトルエンディアン）へ直接読み込む。
+    読み込み方は read_exact と同じ。揃わなければ None。
+    戻り値はそのまま convert_to_voltage_array() に渡せる。
+    """
+    np_ = _require_numpy()
+    arr = np_.empty(n_samples, dtype=np_.dtype(dtype).newbyteorder("<"))
+    return arr if _read_into(handle, memoryview(arr).cast("B"), timeout, "read_adc_chunk") else None
+
+class PipelinedSession:
+    """
+    応答（*OK# 等）を返すコマンドをまとめて送るコンテキストマネージャ。
+    with 内の send() はキューに積むだけで、with を抜けるときに1回の write() で送信し、
+    コマンド数ぶんの1行応答をまとめて読む（応答は responses に順に入る）。
+    with 内で例外が出た場合は何も送信しない。
+        with PipelinedSession(handle) as s:
+            s.send("*9FF00000#")
+            s.send("*AFF00003#")
+    """
+
+    def __init__(self, handle, print_response: bool = True):
+        self.handle = handle
+        self.print_response = print_response
+        self.cmds: list[Union[str, bytes]] = []
+        self.responses: list[bytearray] = []
+
+    def __enter__(self) -> "PipelinedSession":
+        return self
+
+    def send(self, cmd: Union[str, bytes]) -> None:
+        """10文字コマンドを送信キューに積む（1コマンドにつき1行応答を期待）。"""
+        self.cmds.append(cmd)
+
+    def flush(self) -> list[bytearray]:
+        """キュー済みコマンドを送信して応答を読む（with を抜けるときに自動実行）。"""
+        cmds, self.cmds = self.cmds, []
+        resps = _send_many_and_read(self.handle, cmds, print_line=self.print_response)
+        self.responses.extend(resps)
+        return resps
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.flush()
         else:
-            time.sleep(0.01)
-    return bytes(buf)
+            self.cmds.clear()
+        return False
 
 
 # ==========
@@ -231,11 +528,76 @@ def get_sampling_command(fs_ksps: int, target: int = 0) -> str:
     return f"*{(base + index):08X}#"
 
 def convert_to_voltage(adc_value: int, gain: int = 1) -> float:
-    """20bit相当（±524288）を ±5V 基準で換算し、ゲイン倍率を反映。"""
-    MAX_ADC = 524288
-    if adc_value >= MAX_ADC:
-        adc_value -= 2 * MAX_ADC
-    return (adc_value / MAX_ADC) * 5.0 * gain
+    """
+    20bit相当（±524288）を ±5V 基準で換算し、ゲイン倍率を反映。
+    符号拡張は下位20bitに対して分岐なしで行う（convert_to_voltage_array と同じ）。
+    """
+    v = ((adc_value & 0xFFFFF) ^ 0x80000) - 0x80000
+    return (v / 524288.0) * 5.0 * gain
+
+def convert_to_voltage_array(adc_values, gain: int = 1):
+    """
+    convert_to_voltage の NumPy 配列版（チャンク単位の一括変換用）。
+    下位20bitを符号拡張し ±5V 基準で換算、float32 配列を返す。
+    """
+    np_ = _require_numpy()
+    # 32bit 上限の値（0xFFFFFFFF 等）も溢れないよう int64 経由で下位20bitを取り出す（スカラー版と一致）
+    a = (np_.asarray(adc_values, dtype=np_.int64) & 0xFFFFF).astype(np_.int32)
+    a = (a ^ 0x80000) - 0x80000
+    return a.astype(np_.float32) * np_.float32(5.0 * gain / 524288.0)
+
+
+# parse_hex_response 用の Numba カーネル（初回呼び出し時に生成。False = Numba 無し）
+_PARSE_HEX_JIT = None
+
+def _parse_hex_jit():
+    """Numba の import とカーネル定義は重いため、使うときに1度だけ行う。"""
+    global _PARSE_HEX_JIT
+    if _PARSE_HEX_JIT is None:
+        try:
+            from numba import njit, prange
+        except ImportError:  # Numba は parse_hex_response の高速化にのみ使用（無ければ NumPy 版）
+            _PARSE_HEX_JIT = False
+            return False
+
+        @njit(cache=True, parallel=True)
+        def _parse_hex_records_jit(buf, offset, stride, digits, out):
+            for i in prange(out.shape[0]):
+                base = offset + i * stride
+                v = 0
+                for k in range(digits):
+                    c = buf[base + k]
+                    v = (v << 4) | (c - 48 if c < 58 else (c & 0xDF) - 55)
+                out[i] = v
+
+        _PARSE_HEX_JIT = _parse_hex_records_jit
+    return _PARSE_HEX_JIT
+
+def parse_hex_response(buf, digits: int = 5, stride: Optional[int] = None, offset: int = 0):
+    """
+    固定長ASCII-16進レコード列を整数配列に一括変換（例: b"7FFFF,80000,00001" → [524287, 524288, 1]）。
+    digits: 1レコードの16進桁数, stride: レコード間隔[byte]（区切り込み, 既定=digits+1）, offset: 先頭スキップ[byte]
+    ※ 16進以外の文字は検査しない。Numba があればJIT版、無ければ NumPy 版で処理。
+    """
+    np_ = _require_numpy()
+    if stride is None:
+        stride = digits + 1
+    a = np_.frombuffer(buf, dtype=np_.uint8)
+    n = max(0, (len(a) - offset + (stride - digits)) // stride)
+    out = np_.empty(n, dtype=np_.int32 if digits <= 7 else np_.int64)
+    if n == 0:
+        return out
+    kernel = _parse_hex_jit()
+    if kernel:
+        kernel(a, offset, stride, digits, out)
+        return out
+    pad = n * stride - (len(a) - offset)
+    if pad > 0:
+        a = np_.concatenate((a, np_.zeros(pad, dtype=np_.uint8)))
+    recs = a[offset:offset + n * stride].reshape(n, stride)[:, :digits].astype(out.dtype)
+    nib = np_.where(recs < 58, recs - 48, (recs & 0xDF) - 55)
+    shifts = np_.arange(4 * (digits - 1), -1, -4, dtype=out.dtype)
+    return (nib << shifts).sum(axis=1, dtype=out.dtype)
 
 
 # ==========
@@ -248,15 +610,21 @@ def cmd_set_chunk_size(handle, ch: int, chunk_size: int, print_response: bool =
         raise ValueError("CH は 0～15")
     if not (0 <= chunk_size <= 0x07FF):
         raise ValueError("CHUNK_SIZE は 0～2047")
-    cmd = _fmt_cmd("1", ch, 0x0, chunk_size)
+    cmd = _fmt_cmd_bytes("1", ch, 0x0, chunk_size)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_start_accumulation(handle, print_response: bool = True) -> str:
-    """*4 00 2 0000#  ADCデータ蓄積開始"""
-    cmd = _fmt_cmd("4", 0x00, 0x2, 0x0000)
+    """
+    *4 00 2 0000#  ADCデータ蓄積開始（応答後、USB設定をADC連続受信用へ切替）
+    ※ cmd_stop_accumulation までの間はレイテンシタイマが16msになり、イベント文字も無効になるため、
+      その間のコマンド応答（cmd_adc_single_sample, cmd_gpio_read, cmd_encoder_status_read 等）と
+      stop 自身の *OK# は、それぞれ最大16ms待たされる。
+    """
+    cmd = _fmt_cmd_bytes("4", 0x00, 0x2, 0x0000)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    configure_for_streaming(handle)
+    return cmd.decode("ascii")
 
 def cmd_set_chunk_num(handle, ch: int, chunk_num: int, print_response: bool = True) -> str:
     """*4 HH 1 (CHUNK_NUM-1)#   CHUNK_NUM≥1"""
@@ -265,21 +633,22 @@ def cmd_set_chunk_num(handle, ch: int, chunk_num: int, print_response: bool = Tr
     if not (1 <= chunk_num <= 0x10000):
         raise ValueError("CHUNK_NUM は 1～65536")
     field = (chunk_num - 1) & 0xFFFF
-    cmd = _fmt_cmd("4", ch, 0x1, field)
+    cmd = _fmt_cmd_bytes("4", ch, 0x1, field)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_stop_accumulation(handle, print_response: bool = True) -> str:
-    """*4 00 3 0000#  ADCデータ蓄積STOP"""
-    cmd = _fmt_cmd("4", 0x00, 0x3, 0x0000)
+    """*4 00 3 0000#  ADCデータ蓄積STOP（応答後、USB設定をコマンド応答用へ戻す）"""
+    cmd = _fmt_cmd_bytes("4", 0x00, 0x3, 0x0000)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    configure_for_commands(handle)
+    return cmd.decode("ascii")
 
-def cmd_adc_single_sample(handle, ch: int, print_response: bool = True) -> bytes:
+def cmd_adc_single_sample(handle, ch: int, print_response: bool = True) -> bytearray:
     """*4 HH 0 0000#  指定CHの単発1件読み（1行のデータ応答）"""
     if not (0 <= ch <= 0x0F):
         raise ValueError("CH は 0～15")
-    cmd = _fmt_cmd("4", ch, 0x0, 0x0000)
+    cmd = _fmt_cmd_bytes("4", ch, 0x0, 0x0000)
     _write_ascii(handle, cmd)
     resp = _readline(handle, timeout=2.0)
     if print_response and resp:
@@ -295,9 +664,9 @@ def cmd_adc_chunk_request(handle, ch: int, chunk_size: int) -> str:
         raise ValueError("CH は 0～15")
     if not (0 <= chunk_size <= 0x07FF):
         raise ValueError("chunk_size は 0～2047")
-    cmd = _fmt_cmd("4", ch, 0x1, chunk_size)
+    cmd = _fmt_cmd_bytes("4", ch, 0x1, chunk_size)
     _write_ascii(handle, cmd)
-    return cmd
+    return cmd.decode("ascii")
 
 
 # ==========
@@ -308,9 +677,9 @@ def cmd_set_ldac(handle, level: int, print_response: bool = True) -> str:
     """*7 00 0 000y#  LDAC信号 y=0/1"""
     if level not in (0, 1):
         raise ValueError("LDAC レベルは 0 または 1")
-    cmd = _fmt_cmd("7", 0x00, 0x0, level & 0x000F)
+    cmd = _fmt_cmd_bytes("7", 0x00, 0x0, level & 0x000F)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def ldac_mask_from_channels(channels: Iterable[int]) -> int:
     """CH0..CH7 から 8bitマスク（1=LDACで出力しない）。"""
@@ -326,9 +695,9 @@ def cmd_set_ldac_mask(handle, mask: int, print_response: bool = True) -> str:
     if not (0x00 <= mask <= 0xFF):
         raise ValueError("mask は 0x00～0xFF")
     dddd = (mask & 0xFF)  # 00yy
-    cmd = _fmt_cmd("8", 0x00, 0x0, dddd)
+    cmd = _fmt_cmd_bytes("8", 0x00, 0x0, dddd)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_dac_set_data(handle, ch: int, value: int, print_response: bool = True) -> str:
     """*6 HH 1 yyyy#  DAC出力データセット（CH=0..8, yyyy=0x0000..0xFFFF）"""
@@ -336,9 +705,9 @@ def cmd_dac_set_data(handle, ch: int, value: int, print_response: bool = True) -
         raise ValueError("DAC CH は 0～8")
     if not (0x0000 <= value <= 0xFFFF):
         raise ValueError("value は 0x0000～0xFFFF")
-    cmd = _fmt_cmd("6", ch, 0x1, value)
+    cmd = _fmt_cmd_bytes("6", ch, 0x1, value)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_dac_immediate_out(handle, ch: int, value: int, print_response: bool = True) -> str:
     """*6 HH 3 yyyy#  DAC即時出力（CH=0..8）"""
@@ -346,9 +715,9 @@ def cmd_dac_immediate_out(handle, ch: int, value: int, print_response: bool = Tr
         raise ValueError("DAC CH は 0～8")
     if not (0x0000 <= value <= 0xFFFF):
         raise ValueError("value は 0x0000～0xFFFF")
-    cmd = _fmt_cmd("6", ch, 0x3, value)
+    cmd = _fmt_cmd_bytes("6", ch, 0x3, value)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_set_opamp_gain(handle, ch: int, gain_code: int, print_response: bool = True) -> str:
     """
@@ -359,9 +728,9 @@ def cmd_set_opamp_gain(handle, ch: int, gain_code: int, print_response: bool = T
         raise ValueError("CH は 0～15")
     if gain_code not in (0, 1, 2, 3, 4):
         raise ValueError("gain_code は 0～4")
-    cmd = _fmt_cmd("5", ch, 0x0, gain_code & 0x000F)
+    cmd = _fmt_cmd_bytes("5", ch, 0x0, gain_code & 0x000F)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 
 # ==========
@@ -369,6 +738,14 @@ def cmd_set_opamp_gain(handle, ch: int, gain_code: int, print_response: bool = T
 # ==========
 
 # 9) DIR設定（入力/出力）
+def _gpio_dir_cmd(active_channels: Union[str, int, Iterable[int]],
+                  input_channels: Union[str, int, Iterable[int]]) -> str:
+    act = _normalize_channels(active_channels, max_ch=7)
+    ins = _normalize_channels(input_channels,   max_ch=7)
+    hh = _mask_from_channels(act) & 0xFF
+    dddd = _mask_from_channels(ins) & 0xFFFF
+    return _fmt_cmd("9", hh, 0x0, dddd)
+
 def cmd_set_gpio_dir(handle,
                      active_channels: Union[str, int, Iterable[int]],
                      input_channels: Union[str, int, Iterable[int]],
@@ -376,11 +753,7 @@ def cmd_set_gpio_dir(handle,
     """
     *9 HH 0 DDDD#  HH:反映するCHマスク, DDDD: 入力=1 / 出力=0 （bit0=CH0..bit7=CH7）
     """
-    act = _normalize_channels(active_channels, max_ch=7)
-    ins = _normalize_channels(input_channels,   max_ch=7)
-    hh = _mask_from_channels(act) & 0xFF
-    dddd = _mask_from_channels(ins) & 0xFFFF
-    cmd = _fmt_cmd("9", hh, 0x0, dddd)
+    cmd = _gpio_dir_cmd(active_channels, input_channels)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
     return cmd
 
@@ -391,16 +764,18 @@ def cmd_set_gpio_pwm_mode(handle,
                           print_response: bool = True) -> str:
     """
     *A HH 0 DDDD#  DDDD: 1=PWM, 0=GPIO
-    - 先に DIR=出力（コマンド9）へ自動設定（activeのみ）
+    - 先に DIR=出力（コマンド9）へ自動設定（activeのみ）※DIRとモードは1回の送信にまとめる
     - pwm_channels に含まれないCHはGPIO（=0）
     """
     act = _normalize_channels(active_channels, max_ch=7)
     pwm = _normalize_channels(pwm_channels,   max_ch=7)
-    cmd_set_gpio_dir(handle, active_channels=act, input_channels=[], print_response=print_response)
     hh = _mask_from_channels(act) & 0xFF
     dd = _mask_from_channels([c for c in pwm if c in act]) & 0xFFFF
     cmd = _fmt_cmd("A", hh, 0x0, dd)
-    _send_and_read_one_line(handle, cmd, print_line=print_response)
+    _send_many_and_read(handle, [
+        _gpio_dir_cmd(act, []),           # DIR=出力
+        cmd,                              # PWM/GPIO 切替
+    ], print_line=print_response)
     return cmd
 
 # A) エンコーダーモード指定（E=1）— 引数1つに統一
@@ -413,13 +788,12 @@ def cmd_set_encoder_mode(handle,
     """
     chs = _normalize_channels(channels, max_ch=3)
     hh = _mask_from_channels(chs) & 0xFF
-    # DIR=入力
-    cmd_set_gpio_dir(handle, active_channels=chs, input_channels=chs, print_response=print_response)
-    # GPIO固定
-    _send_and_read_one_line(handle, _fmt_cmd("A", hh, 0x0, 0x0000), print_line=print_response)
-    # ENC有効
     cmd = _fmt_cmd("A", hh, 0x1, 0x0000)
-    _send_and_read_one_line(handle, cmd, print_line=print_response)
+    _send_many_and_read(handle, [
+        _gpio_dir_cmd(chs, chs),          # DIR=入力
+        _fmt_cmd("A", hh, 0x0, 0x0000),   # GPIO固定
+        cmd,                              # ENC有効
+    ], print_line=print_response)
     return cmd
 
 # A) ENCx_PRESET_HI/LO（E=2/3） + 32bit一括
@@ -434,37 +808,31 @@ def _norm_enc_ch(ch: Union[str, int]) -> list[int]:
 def _hh_from_single_ch(ch: int) -> int:
     return ch & 0xFF  # ここは“単一CH番号”をそのままHHに入れる仕様
 
-def cmd_encoder_preset_hi(handle, ch: Union[str, int], value16: int, print_response: bool = True) -> list[str]:
-    """*A HH 2 DDDD#  ENCx_PRESET_HI（上位16bit）"""
+def _encoder_preset_cmds(ch: Union[str, int], E: int, value16: int) -> list[str]:
     if not (0x0000 <= value16 <= 0xFFFF):
         raise ValueError("value16 は 0x0000～0xFFFF")
-    cmds = []
-    for c in _norm_enc_ch(ch):
-        cmd = _fmt_cmd("A", _hh_from_single_ch(c), 0x2, value16)
-        cmds.append(cmd)
-        _send_and_read_one_line(handle, cmd, print_line=print_response)
+    return [_fmt_cmd("A", _hh_from_single_ch(c), E, value16) for c in _norm_enc_ch(ch)]
+
+def cmd_encoder_preset_hi(handle, ch: Union[str, int], value16: int, print_response: bool = True) -> list[str]:
+    """*A HH 2 DDDD#  ENCx_PRESET_HI（上位16bit）"""
+    cmds = _encoder_preset_cmds(ch, 0x2, value16)
+    _send_many_and_read(handle, cmds, print_line=print_response)
     return cmds
 
 def cmd_encoder_preset_lo(handle, ch: Union[str, int], value16: int, print_response: bool = True) -> list[str]:
     """*A HH 3 DDDD#  ENCx_PRESET_LO（下位16bit）"""
-    if not (0x0000 <= value16 <= 0xFFFF):
-        raise ValueError("value16 は 0x0000～0xFFFF")
-    cmds = []
-    for c in _norm_enc_ch(ch):
-        cmd = _fmt_cmd("A", _hh_from_single_ch(c), 0x3, value16)
-        cmds.append(cmd)
-        _send_and_read_one_line(handle, cmd, print_line=print_response)
+    cmds = _encoder_preset_cmds(ch, 0x3, value16)
+    _send_many_and_read(handle, cmds, print_line=print_response)
     return cmds
 
 def cmd_encoder_preset_32(handle, ch: Union[str, int], value32: int, print_response: bool = True) -> list[str]:
-    """32bit一括（内部で HI→LO 送信し毎回1行読む）"""
+    """32bit一括（HI→LO を1回の送信にまとめ、コマンド数ぶん1行読む）"""
     if not (0x00000000 <= value32 <= 0xFFFFFFFF):
         raise ValueError("value32 は 0x00000000～0xFFFFFFFF")
     hi = (value32 >> 16) & 0xFFFF
     lo = value32 & 0xFFFF
-    cmds: list[str] = []
-    cmds += cmd_encoder_preset_hi(handle, ch, hi, print_response=print_response)
-    cmds += cmd_encoder_preset_lo(handle, ch, lo, print_response=print_response)
+    cmds = _encoder_preset_cmds(ch, 0x2, hi) + _encoder_preset_cmds(ch, 0x3, lo)
+    _send_many_and_read(handle, cmds, print_line=print_response)
     return cmds
 
 # A) エンコーダ制御（E=4）
@@ -482,16 +850,13 @@ def cmd_encoder_ctrl(handle,
     if do_reset and load_preset:
         raise ValueError("do_reset と load_preset の同時指定は不可")
     chs = _normalize_channels(channels, max_ch=3)
-    cmds = []
-    for ch in chs:
-        d = 0x0000
-        if dir_invert is True:  d |= (1 << 0)
-        elif dir_invert is False:  d |= 0  # 明示0
-        if do_reset:    d |= (1 << 1)
-        if load_preset: d |= (1 << 2)
-        cmd = _fmt_cmd("A", _hh_from_single_ch(ch), 0x4, d)
-        cmds.append(cmd)
-        _send_and_read_one_line(handle, cmd, print_line=print_response)
+    d = 0x0000
+    if dir_invert is True:  d |= (1 << 0)
+    elif dir_invert is False:  d |= 0  # 明示0
+    if do_reset:    d |= (1 << 1)
+    if load_preset: d |= (1 << 2)
+    cmds = [_fmt_cmd("A", _hh_from_single_ch(ch), 0x4, d) for ch in chs]
+    _send_many_and_read(handle, cmds, print_line=print_response)
     return cmds
 
 def cmd_encoder_dir_invert(handle, channels, invert: bool, print_response: bool = True) -> list[str]:
@@ -514,20 +879,22 @@ def cmd_pwm_set_frequency(handle,
     """
     if freq_hz < 0:
         raise ValueError("freq_hz は 0 以上")
-    cmds = []
-    for ch in _normalize_channels(channels, max_ch=7):
-        if 0 <= freq_hz <= 4095:
-            dddd = freq_hz
-        elif (freq_hz % 1000 == 0) and (0 <= (freq_hz // 1000) <= 97):
-            dddd = 0x8000 + (freq_hz // 1000)
-        else:
-            raise ValueError("周波数は 0..4095Hz または 0..97kHz(1kHz刻み)")
-        cmd = _fmt_cmd("B", ch, 0x0, dddd)
-        cmds.append(cmd)
-        _send_and_read_one_line(handle, cmd, print_line=print_response)
+    if 0 <= freq_hz <= 4095:
+        dddd = freq_hz
+    elif (freq_hz % 1000 == 0) and (0 <= (freq_hz // 1000) <= 97):
+        dddd = 0x8000 + (freq_hz // 1000)
+    else:
+        raise ValueError("周波数は 0..4095Hz または 0..97kHz(1kHz刻み)")
+    cmds = [_fmt_cmd("B", ch, 0x0, dddd) for ch in _normalize_channels(channels, max_ch=7)]
+    _send_many_and_read(handle, cmds, print_line=print_response)
     return cmds
 
 # C) PWM デューティ比設定（E=0）
+@lru_cache(maxsize=8 * 1024)
+def _pwm_duty_cmd(ch: int, code: int) -> bytes:
+    """'*C HH 0 DDDD#' のCH×コードごとのキャッシュ（8CH×1024コード）"""
+    return _fmt_cmd_bytes("C", ch, 0x0, code)
+
 def cmd_pwm_set_data_raw(handle,
                          channels: Union[str, int, Iterable[int]],
                          dddd: int,
@@ -537,12 +904,22 @@ def cmd_pwm_set_data_raw(handle,
     """
     if not (0x0000 <= dddd <= 0x03FF):
         raise ValueError("DDDD は 0x0000～0x03FF")
-    cmds = []
-    for ch in _normalize_channels(channels, max_ch=7):
-        cmd = _fmt_cmd("C", ch, 0x0, dddd)
-        cmds.append(cmd)
-        _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmds
+    cmds = [_pwm_duty_cmd(ch, dddd) for ch in _normalize_channels(channels, max_ch=7)]
+    _send_many_and_read(handle, cmds, print_line=print_response)
+    return [c.decode("ascii") for c in cmds]
+
+def _duty_to_code(duty: float) -> int:
+    if duty == 0.0:
+        return 0x0000
+    if duty == 1.0:
+        return 0x03FF
+    ticks = int(duty * 1024)
+    if   ticks <= 0:   return 0x0001
+    elif ticks >= 1023: return 0x03FE
+    return 0x01FF if abs(duty - 0.5) < (1/1024) else ticks
+
+# int(duty*1024) → DDDD（duty=0.0 ちょうどは 0000h。添字0 は 0<duty<1/1024 用）
+_DUTY_LUT = (0x0001,) + tuple(_duty_to_code(i / 1024) for i in range(1, 1025))
 
 def cmd_pwm_set_duty(handle,
                      channels: Union[str, int, Iterable[int]],
@@ -555,22 +932,13 @@ def cmd_pwm_set_duty(handle,
     """
     if not (0.0 <= duty <= 1.0):
         raise ValueError("duty は 0.0～1.0")
-    if duty == 0.0:
-        code = 0x0000
-    elif duty == 1.0:
-        code = 0x03FF
-    else:
-        ticks = int(duty * 1024)
-        if   ticks <= 0:   code = 0x0001
-        elif ticks >= 1023: code = 0x03FE
-        else:
-            code = 0x01FF if abs(duty - 0.5) < (1/1024) else ticks
+    code = 0x0000 if duty == 0.0 else _DUTY_LUT[int(duty * 1024)]
     return cmd_pwm_set_data_raw(handle, channels, code, print_response)
 
 # D) GPIO 読み取り（E=0）/ エンコーダーステータス（E=1）
-def cmd_gpio_read(handle, print_response: bool = True) -> tuple[str, int, bytes]:
+def cmd_gpio_read(handle, print_response: bool = True) -> tuple[str, int, bytearray]:
     """*D 00 0 0000# → 応答: '*D0000XX#' 想定（XX=下位8bit）"""
-    cmd = _fmt_cmd("D", 0x00, 0x0, 0x0000)
+    cmd = _fmt_cmd_bytes("D", 0x00, 0x0, 0x0000)
     _write_ascii(handle, cmd)
     resp = _readline(handle, timeout=2.0)
     if resp and print_response:
@@ -583,19 +951,28 @@ def cmd_gpio_read(handle, print_response: bool = True) -> tuple[str, int, bytes]
             value = int(hx[-2:], 16)
     except Exception:
         pass
-    return cmd, value, resp if resp else b""
+    return cmd.decode("ascii"), value, resp
 
 def cmd_encoder_status_read(handle, channel: int, print_response: bool = True) -> dict:
     """*D HH 1 0000# → CSVっぽい文字列を返すので生文字列と簡易パースを返却。"""
     if not (0 <= channel <= 3):
         raise ValueError("channel は 0～3")
-    cmd = _fmt_cmd("D", channel, 0x1, 0x0000)
+    cmd = _fmt_cmd_bytes("D", channel, 0x1, 0x0000)
     _write_ascii(handle, cmd)
     resp = _readline(handle, timeout=2.0)
     txt = resp.decode(errors="ignore").strip() if resp else ""
     if print_response and txt:
         print(txt)
     result = {"raw": txt, "ch": channel, "count": None, "dir": None, "ovf": None, "ae": None}
+    m = _ENC_STATUS_RE.match(resp.strip()) if resp else None
+    if m:
+        pc = m["count"]
+        # A～F を含むときだけ16進（従来どおり）
+        result["count"] = int(pc, 16 if pc.translate(None, b"+-0123456789") else 10)
+        for key in ("dir", "ovf", "ae"):
+            if m[key] is not None:
+                result[key] = m[key].decode(errors="ignore")
+        return result
     try:
         body = txt[2:] if txt.startswith("*D") else txt
         parts = [p for p in body.split(",") if p]
@@ -615,16 +992,13 @@ def cmd_gpio_write(handle, value: int, print_response: bool = True) -> str:
     """*E 00 0 DDDD#（下位8bitが出力。入力設定のポートは変化なし）"""
     if not (0x00 <= value <= 0xFF):
         raise ValueError("value は 0x00～0xFF")
-    cmd = _fmt_cmd("E", 0x00, 0x0, value & 0x00FF)
+    cmd = _fmt_cmd_bytes("E", 0x00, 0x0, value & 0x00FF)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_gpio_write_mask(handle, high_channels: Union[str, int, Iterable[int]], print_response: bool = True) -> str:
     """ハイにしたいCH列挙（"all"可）で一括設定。"""
-    chs = _normalize_channels(high_channels, max_ch=7)
-    mask = 0
-    for ch in chs:
-        mask |= (1 << ch)
+    mask = _mask_from_channels(_normalize_channels(high_channels, max_ch=7))
     return cmd_gpio_write(handle, mask & 0xFF, print_response)
 
 # F) リセット（E=0, HH=00 固定）
@@ -633,12 +1007,102 @@ def cmd_reset(handle, mode: str = "all", print_response: bool = True) -> str:
     if mode not in ("all", "adc"):
         raise ValueError('mode は "all" か "adc"')
     dddd = 0x0000 if mode == "all" else 0x0001
-    cmd = _fmt_cmd("F", 0x00, 0x0, dddd)
+    cmd = _fmt_cmd_bytes("F", 0x00, 0x0, dddd)
     _send_and_read_one_line(handle, cmd, print_line=print_response)
-    return cmd
+    return cmd.decode("ascii")
 
 def cmd_reset_all(handle, print_response: bool = True) -> str:
     return cmd_reset(handle, "all", print_response)
 
 def cmd_reset_adc_tx(handle, print_response: bool = True) -> str:
     return cmd_reset(handle, "adc", print_response)
+
+
+# ==========
+# ★ asyncio 対応（専用I/Oスレッド）
+# ==========
+
+def _resolve_future(fut: "asyncio.Future", result=None, exc: Optional[BaseException] = None) -> None:
+    if fut.done():  # await 側でキャンセル済み
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(result)
+
+class AdioReactor:
+    """
+    FTDI handle を専用I/Oスレッド1本で扱い、asyncio から await で使えるようにする。
+    送受信はすべてI/Oスレッド上で投入順に実行されるため、イベントループを止めず、
+    複数タスクから同じ handle を共有できる。
+    cmd_* は reactor.cmd_xxx(...) で await 可能（第1引数の handle は不要）。
+        async with AdioReactor(handle) as r:
+            await r.cmd_set_ldac(1, print_response=False)
+            cmd, value, raw = await r.cmd_gpio_read(print_response=False)
+            resp = await r.send("*70000000#")
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="adio-reactor", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            func, args, kwargs, fut, loop = item
+            try:
+                result, exc = func(self.handle, *args, **kwargs), None
+            except BaseException as e:
+                result, exc = None, e
+            try:
+                loop.call_soon_threadsafe(_resolve_future, fut, result, exc)
+            except RuntimeError:  # await 側のイベントループが終了済み → 結果は捨てる
+                pass
+
+    async def call(self, func, *args, **kwargs):
+        """func(handle, *args, **kwargs) をI/Oスレッドで実行し、その戻り値を返す。"""
+        if self._closed:
+            raise RuntimeError("AdioReactor は close 済みです")
+        if not self._thread.is_alive():
+            raise RuntimeError("AdioReactor のI/Oスレッドが停止しています")
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._queue.put((func, args, kwargs, fut, loop))
+        return await fut
+
+    async def send(self, cmd: Union[str, bytes], print_response: bool = False) -> bytearray:
+        """10文字コマンドを送信し、1行応答を返す。"""
+        return await self.call(_send_and_read_one_line, cmd, print_line=print_response)
+
+    def __getattr__(self, name: str):
+        func = globals().get(name) if name.startswith("cmd_") else None
+        if func is None:
+            raise AttributeError(name)
+        return partial(self.call, func)
+
+    def close(self) -> None:
+        """投入済みの処理を終えてからI/Oスレッドを止める（handle は閉じない）。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> "AdioReactor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+    async def __aenter__(self) -> "AdioReactor":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+        return False
@@ -0,0 +1,14 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import ftd2xx  # noqa: F401
+except ImportError:  # D2XX が無い環境でも、実機を使わないテストは動かす
+    _defines = types.ModuleType("ftd2xx.defines")
+    _ftd2xx = types.ModuleType("ftd2xx")
+    _ftd2xx.defines = _defines
+    sys.modules["ftd2xx"] = _ftd2xx
+    sys.modules["ftd2xx.defines"] = _defines
@@ -0,0 +1,35 @@
+import pytest
+
+import ADio_Utils as adu
+
+
+class _ReplyHandle:
+    """書き込みを無視し、決まった応答1行だけを返す擬似 handle。"""
+
+    def __init__(self, reply: bytes):
+        self._rx = bytearray(reply)
+
+    def write(self, data):
+        return len(data)
+
+    def getQueueStatus(self):
+        return len(self._rx)
+
+    def read(self, n):
+        out = bytes(self._rx[:n])
+        del self._rx[:n]
+        return out
+
+
+@pytest.mark.parametrize("reply, count, direction, ovf, ae", [
+    (b"*D0,0000ABCDH,CW,0,1#\r\n", 0xABCD, "CW", "0", "1"),
+    (b"*D1,-12,CCW,0,0#\r\n", -12, "CCW", "0", "0"),
+    (b"2,+5,CW#\r\n", 5, "CW", None, None),
+    (b"*D0,0x1F,CW,0,0#\r\n", 31, "CW", "0", "0"),
+    (b"*D0,1234,C W,0,0#\r\n", 1234, "C W", "0", "0"),
+    (b"*D0,,CW,0,0#\r\n", None, None, None, None),
+    (b"*OK#\r\n", None, None, None, None),
+])
+def test_encoder_status_read_parses_reply(reply, count, direction, ovf, ae):
+    r = adu.cmd_encoder_status_read(_ReplyHandle(reply), 0, print_response=False)
+    assert (r["count"], r["dir"], r["ovf"], r["ae"]) == (count, direction, ovf, ae)
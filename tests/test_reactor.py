@@ -0,0 +1,31 @@
+import asyncio
+import threading
+
+import pytest
+
+import ADio_Utils as adu
+
+
+def test_reactor_survives_closed_event_loop():
+    release = threading.Event()
+
+    def slow(handle):
+        release.wait(5)
+        return handle
+
+    with adu.AdioReactor(handle="H") as r:
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(r.call(slow), 0.05))
+        release.set()  # 終了済みのイベントループへ結果を返させる
+
+        async def main():
+            return await asyncio.wait_for(r.call(lambda h: h), 5)
+
+        assert asyncio.run(main()) == "H"
+
+
+def test_reactor_call_after_close_raises():
+    r = adu.AdioReactor(handle="H")
+    r.close()
+    with pytest.raises(RuntimeError):
+        asyncio.run(r.call(lambda h: h))